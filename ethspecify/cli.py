@@ -1,18 +1,71 @@
 import argparse
+import heapq
 import json
 import os
+import re
+import stat
 import sys
 
-from .core import grep, replace_spec_tags, get_pyspec, get_spec_item_history, load_config, run_checks, sort_specref_yaml, generate_specref_files, generate_config_file
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Spec item categories as (heading, tag attribute, history key), in display order
+_TAG_CATEGORIES = (
+    ("Functions", "fn", "functions"),
+    ("Constants", "constant_var", "constant_vars"),
+    ("Custom Types", "custom_type", "custom_types"),
+    ("SSZ Objects", "ssz_object", "ssz_objects"),
+    ("Dataclasses", "dataclass", "dataclasses"),
+    ("Preset Variables", "preset_var", "preset_vars"),
+    ("Config Variables", "config_var", "config_vars"),
+)
+
+
+# Type prefixes for missing items, keyed by specref section name
+_SECTION_TYPE_PREFIXES = {
+    "Config Variables": "config_var",
+    "Preset Variables": "preset_var",
+    "Ssz Objects": "ssz_object",
+    "Dataclasses": "dataclass",
+}
+
+
+def _is_dir(path):
+    """Check if path is a directory with a single stat call."""
+    try:
+        return stat.S_ISDIR(os.stat(path).st_mode)
+    except (OSError, ValueError):
+        return False
+
+
+def _print_json(obj):
+    """Print obj as JSON indented by two spaces, using orjson if it is installed."""
+    if orjson is not None:
+        print(orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8"))
+    else:
+        print(json.dumps(obj, indent=2))
 
 
 def process(args):
     """Process all spec tags and sort specref YAML files."""
+    # Import lazily so that commands like --help don't pay for loading core
+    from .core import SPEC_RE, grep, load_config, replace_spec_tags, sort_specref_yaml
+
     project_dir = os.path.abspath(os.path.expanduser(args.path))
-    if not os.path.isdir(project_dir):
+    if not _is_dir(project_dir):
         print(f"Error: The directory {repr(project_dir)} does not exist.")
         return 1
 
+    # Compile the exclude patterns once, reporting any which are invalid
+    try:
+        excludes = [re.compile(pattern) for pattern in args.exclude]
+    except re.error as e:
+        print(f"Error: Invalid exclude pattern: {e}")
+        return 1
+
     # Load config once from the project directory
     config = load_config(project_dir)
 
@@ -32,9 +85,12 @@ def process(args):
         specrefs_files = []
 
     # Process spec tags in files
-    for f in grep(project_dir, r"<spec\b.*?>", args.exclude):
+    for f in grep(project_dir, SPEC_RE, excludes, args.max_filesize):
         print(f"Processing file: {f}")
-        replace_spec_tags(f, config)
+        try:
+            replace_spec_tags(f, config)
+        except UnicodeDecodeError:
+            print(f"Skipping file which is not valid UTF-8: {f}")
 
     # Add missing spec items to YAML files if enabled
     if auto_add_missing:
@@ -65,6 +121,8 @@ def list_tags(args):
 
 def _list_tags_with_history(args, preset, version):
     """List all tags with their fork history."""
+    from .core import get_spec_item_history
+
     try:
         history = get_spec_item_history(preset, version)
     except ValueError as e:
@@ -77,36 +135,43 @@ def _list_tags_with_history(args, preset, version):
             "mode": "history",
             "history": history
         }
-        print(json.dumps(result, indent=2))
+        _print_json(result)
     else:
-        print(f"Available tags across all forks ({preset} preset):")
-
-        def _print_items_with_history(category_name, items_dict, spec_attr):
-            """Helper to print items with their fork history."""
+        lines = [f"Available tags across all forks ({preset} preset):"]
+
+        # Compile the comma-separated search terms into one case-insensitive pattern
+        matcher = None
+        if args.search is not None:
+            terms = [term.strip() for term in args.search.split(",") if term.strip()]
+            if not terms:
+                # Without any terms, match the whole search string as given
+                terms = [args.search]
+            matcher = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+
+        for category_name, spec_attr, history_key in _TAG_CATEGORIES:
+            items_dict = history[history_key]
             if not items_dict:
-                return
-            print(f"\n{category_name}:")
-            for item_name in sorted(items_dict.keys()):
-                if args.search is None or args.search.lower() in item_name.lower():
-                    forks = items_dict[item_name]
-                    fork_list = ", ".join(forks)
-                    print(f"  <spec {spec_attr}=\"{item_name}\" /> ({fork_list})")
-
-        _print_items_with_history("Functions", history['functions'], "fn")
-        _print_items_with_history("Constants", history['constant_vars'], "constant_var")
-        _print_items_with_history("Custom Types", history['custom_types'], "custom_type")
-        _print_items_with_history("SSZ Objects", history['ssz_objects'], "ssz_object")
-        _print_items_with_history("Dataclasses", history['dataclasses'], "dataclass")
-        _print_items_with_history("Preset Variables", history['preset_vars'], "preset_var")
-        _print_items_with_history("Config Variables", history['config_vars'], "config_var")
+                continue
+            lines.append(f"\n{category_name}:")
+            item_names = sorted(items_dict)
+            if matcher is not None:
+                item_names = [item_name for item_name in item_names if matcher.search(item_name)]
+            # Build the line template once per category rather than once per item
+            template = f"  <spec {spec_attr}=\"%s\" /> (%s)"
+            lines.extend(template % (item_name, ", ".join(items_dict[item_name])) for item_name in item_names)
+
+        # Write everything at once instead of calling print for each item
+        sys.stdout.write("\n".join(lines) + "\n")
 
     return 0
 
 
 def check(args):
     """Run checks to validate spec references."""
+    from .core import load_config, run_checks
+
     project_dir = os.path.abspath(os.path.expanduser(args.path))
-    if not os.path.isdir(project_dir):
+    if not _is_dir(project_dir):
         print(f"Error: The directory {repr(project_dir)} does not exist.")
         return 1
 
@@ -114,20 +179,22 @@ def check(args):
     config = load_config(project_dir)
 
     # Run checks
-    success, results = run_checks(project_dir, config)
+    success, results = run_checks(project_dir, config, args.fast_fail)
 
-    # Collect all missing items and errors
+    # Collect missing items as one sorted list per section
     all_missing = []
-    all_errors = []
+    has_errors = False
     total_coverage = {"found": 0, "expected": 0}
     total_source_files = {"valid": 0, "total": 0}
 
     for section_name, section_results in results.items():
-        # Collect source file errors
+        # Source file errors are printed per section, ahead of all missing items
         source = section_results['source_files']
         total_source_files["valid"] += source["valid"]
         total_source_files["total"] += source["total"]
-        all_errors.extend(source["errors"])
+        if source["errors"]:
+            sys.stdout.write("\n".join(source["errors"]) + "\n")
+            has_errors = True
 
         # Collect missing items
         coverage = section_results['coverage']
@@ -136,32 +203,26 @@ def check(args):
 
         # For Project Coverage, items already have the proper prefix
         if section_name == "Project Coverage":
-            for missing in coverage['missing']:
-                all_missing.append(f"MISSING: {missing}")
+            all_missing.append(sorted(f"MISSING: {missing}" for missing in coverage['missing']))
         else:
             # Determine the type prefix from section name for YAML-based checks
-            if "Config Variables" in section_name:
-                type_prefix = "config_var"
-            elif "Preset Variables" in section_name:
-                type_prefix = "preset_var"
-            elif "Ssz Objects" in section_name:
-                type_prefix = "ssz_object"
-            elif "Dataclasses" in section_name:
-                type_prefix = "dataclass"
-            else:
-                type_prefix = section_name.lower().replace(" ", "_")
-
-            for missing in coverage['missing']:
-                all_missing.append(f"MISSING: {type_prefix}.{missing}")
-
-    # Display only errors and missing items
-    for error in all_errors:
-        print(error)
-
-    for missing in sorted(all_missing):
-        print(missing)
-
-    if all_errors or all_missing:
+            type_prefix = _SECTION_TYPE_PREFIXES.get(section_name)
+            if type_prefix is None:
+                # Section names can also carry a path or a preset suffix
+                type_prefix = next(
+                    (prefix for name, prefix in _SECTION_TYPE_PREFIXES.items() if name in section_name),
+                    section_name.lower().replace(" ", "_"),
+                )
+
+            all_missing.append(sorted(f"MISSING: {type_prefix}.{missing}" for missing in coverage['missing']))
+
+    # Display missing items, merging the already sorted sections
+    missing_lines = list(heapq.merge(*all_missing))
+    if missing_lines:
+        sys.stdout.write("\n".join(missing_lines) + "\n")
+
+    # A specrefs file which is configured but missing only shows up in success
+    if not success or has_errors or missing_lines:
         return 1
     else:
         total_refs = total_coverage['expected']
@@ -171,6 +232,8 @@ def check(args):
 
 def list_forks(args):
     """List all available forks."""
+    from .core import get_pyspec
+
     pyspec = get_pyspec()
     preset = args.preset
 
@@ -190,7 +253,7 @@ def list_forks(args):
             "preset": preset,
             "forks": forks
         }
-        print(json.dumps(result, indent=2))
+        _print_json(result)
     else:
         print(f"Available forks for {preset} preset:")
         for fork in forks:
@@ -201,6 +264,8 @@ def list_forks(args):
 
 def init(args):
     """Initialize .ethspecify.yml and optionally a specrefs directory."""
+    from .core import generate_config_file, generate_specref_files
+
     version = args.version
 
     # Check if .ethspecify.yml already exists
@@ -236,7 +301,12 @@ def init(args):
             return 1
 
 
-def main():
+# First arguments which are handled without inserting the default 'process' command
+_COMMANDS = {"process", "list-tags", "check", "list-forks", "init", "-h", "--help"}
+
+
+def _build_parser():
+    """Build the argument parser for all commands."""
     parser = argparse.ArgumentParser(
         description="Process files containing <spec> tags."
     )
@@ -259,6 +329,12 @@ def main():
         help="Exclude paths matching this regex",
         default=[],
     )
+    process_parser.add_argument(
+        "--max-filesize",
+        type=int,
+        help="Skip files larger than this many bytes (default: no limit)",
+        default=None,
+    )
 
     # Parser for 'list-tags' command
     list_tags_parser = subparsers.add_parser("list-tags", help="List available specification tags with fork history")
@@ -273,7 +349,7 @@ def main():
     list_tags_parser.add_argument(
         "--search",
         type=str,
-        help="Filter tags by search term",
+        help="Filter tags by search term (case-insensitive; separate multiple terms with commas)",
         default=None,
     )
     list_tags_parser.add_argument(
@@ -292,6 +368,11 @@ def main():
         help="Directory containing YAML files to check",
         default=".",
     )
+    check_parser.add_argument(
+        "--fast-fail",
+        action="store_true",
+        help="Stop checking after the first specrefs file with problems",
+    )
 
     # Parser for 'list-forks' command
     list_forks_parser = subparsers.add_parser("list-forks", help="List available forks")
@@ -330,12 +411,16 @@ def main():
         default="specrefs",
     )
 
-    # Default to 'process' if no args are provided
-    if len(sys.argv) == 1:
+    return parser
+
+
+def main():
+    # Default to 'process' if no command is given, e.g. `ethspecify --path src`
+    if len(sys.argv) == 1 or sys.argv[1] not in _COMMANDS:
         sys.argv.insert(1, "process")
 
-    args = parser.parse_args()
-    exit(args.func(args))
+    args = _build_parser().parse_args()
+    sys.exit(args.func(args))
 
 
 if __name__ == "__main__":
@@ -1,15 +1,51 @@
-import difflib
+import collections
+import concurrent.futures
 import functools
 import glob
 import hashlib
 import io
+import mmap
 import os
 import re
 import requests
+import shutil
 import textwrap
 import tokenize
 import yaml
 
+try:
+    from cydifflib import unified_diff
+except ImportError:
+    from difflib import unified_diff
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+
+# Matches the opening of a spec tag; used to find files which contain spec tags
+SPEC_RE = re.compile(rb"<spec\b[^>]*>")
+
+# Patterns used for every spec tag or specref entry, compiled once
+_OPEN_TAG_RE = re.compile(r'<spec\b([^>]*)>')
+_TAG_ATTRS_RE = re.compile(r'<spec\s+([^>]+)>')
+_OPEN_TAG_ATTRS_RE = re.compile(r'<spec\s+([^>]+?)(?:\s*/>|>)')
+_ATTR_RE = re.compile(r'(\w+)="(.*?)"')
+_NONEMPTY_ATTR_RE = re.compile(r'(\w+)="([^"]+)"')
+_FORK_RE = re.compile(r'fork="([^"]+)"')
+_YAML_SEARCH_FIX_RE = re.compile(r'(\s+search:\s+)([^"\n]+:)(\s*$)', re.MULTILINE)
+_YAML_UNQUOTED_SEARCH_FIX_RE = re.compile(r'(\s+search:\s+)([^"\'\n]+:)(\s*$)', re.MULTILINE)
+_SINGLE_QUOTED_SEARCH_RE = re.compile(r"search:\s*'([^']*)'")
+_DOUBLE_QUOTED_SEARCH_RE = re.compile(r'search:\s*"([^"]*)"')
+
+# Number of threads used to overlap file reads
+_IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Use the libyaml-backed loaders when PyYAML was built with them
+_SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_FullLoader = getattr(yaml, "CFullLoader", yaml.FullLoader)
+
 
 def validate_exception_items(exceptions, version, require_exceptions_have_fork=False):
     """
@@ -112,7 +148,7 @@ def load_config(directory=None):
     if os.path.exists(config_path):
         try:
             with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
+                config = yaml.load(f, Loader=_SafeLoader)
                 if not config:
                     return {}
 
@@ -162,193 +198,361 @@ def is_excepted(item_name, fork, exceptions):
     return False
 
 
+# The same spec item is often diffed by many tags, so remember recent results
+@functools.lru_cache(maxsize=4096)
 def strip_comments(code):
+    # Without comments, rebuilding the lines from tokens only strips trailing
+    # whitespace, unless the code has multi-line strings, continuations or tabs,
+    # or line breaks which splitlines() and the tokenizer count differently
+    if not any(marker in code for marker in ("#", "\\", "\t", '"""', "'''")):
+        lines = code.splitlines()
+        if len(lines) == code.count("\n") + (1 if code and not code.endswith("\n") else 0):
+            return "\n".join(line.rstrip() for line in lines)
+
     # Split the original code into lines so we can decide which to keep or skip
     code_lines = code.splitlines(True)  # Keep line endings in each element
 
-    # Dictionary: line_index -> list of (column, token_string)
-    non_comment_tokens = {}
+    # Dictionary: line_index -> line rebuilt from its non-comment tokens
+    code_by_line = {}
 
-    # Tokenize the entire code
+    # Tokenize the entire code. Tokens arrive in source order, so each line is
+    # rebuilt as its tokens stream in, with no need to collect and sort them.
+    row = None
+    parts = []
+    last_col = 0
     tokens = tokenize.generate_tokens(io.StringIO(code).readline)
     for ttype, tstring, (srow, scol), _, _ in tokens:
         # Skip comments and pure newlines
-        if ttype == tokenize.COMMENT:
-            continue
-        if ttype in (tokenize.NEWLINE, tokenize.NL):
+        if ttype in (tokenize.COMMENT, tokenize.NEWLINE, tokenize.NL):
             continue
-        # Store all other tokens, adjusting line index to be zero-based
-        non_comment_tokens.setdefault(srow - 1, []).append((scol, tstring))
+        if srow != row:
+            # Strip trailing whitespace at the end of the finished line
+            if row is not None:
+                code_by_line[row - 1] = "".join(parts).rstrip()
+            row = srow
+            parts = []
+            last_col = 0
+        # Insert spaces if there's a gap (preserving indentation/spaces)
+        if scol > last_col:
+            parts.append(" " * (scol - last_col))
+        parts.append(tstring)
+        last_col = scol + len(tstring)
+    if row is not None:
+        code_by_line[row - 1] = "".join(parts).rstrip()
 
     final_lines = []
     # Reconstruct or skip lines
     for i, original_line in enumerate(code_lines):
-        # If the line has no non-comment tokens
-        if i not in non_comment_tokens:
-            # Check whether the original line is truly blank (just whitespace)
-            if original_line.strip():
-                # The line wasn't empty => it was a comment-only line, so skip it
-                continue
-            else:
-                # A truly empty/blank line => keep it
-                final_lines.append("")
-        else:
-            # Reconstruct this line from the stored tokens (preserving indentation/spaces)
-            tokens_for_line = sorted(non_comment_tokens[i], key=lambda x: x[0])
-            line_str = ""
-            last_col = 0
-            for col, token_str in tokens_for_line:
-                # Insert spaces if there's a gap
-                if col > last_col:
-                    line_str += " " * (col - last_col)
-                line_str += token_str
-                last_col = col + len(token_str)
-            # Strip trailing whitespace at the end of the line
-            final_lines.append(line_str.rstrip())
+        line = code_by_line.get(i)
+        if line is not None:
+            final_lines.append(line)
+        elif not original_line.strip():
+            # A truly empty/blank line => keep it
+            final_lines.append("")
+        # Otherwise it was a comment-only line, so skip it
 
     return "\n".join(final_lines)
 
 
-def grep(root_directory, search_pattern, excludes=[]):
-    matched_files = []
-    regex = re.compile(search_pattern)
-    exclude_patterns = [re.compile(pattern) for pattern in excludes]
-    for dirpath, _, filenames in os.walk(root_directory):
-        for filename in filenames:
-            file_path = os.path.join(dirpath, filename)
-            if any(pattern.search(file_path) for pattern in exclude_patterns):
-                continue
+def _walk_files(directory, exclude_patterns):
+    """
+    Yield the path of every file below directory which matches no exclude pattern.
+    Patterns are only matched against file paths, so every directory is walked.
+    """
+    try:
+        entries = os.scandir(directory)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
             try:
-                with open(file_path, "r", encoding="utf-8") as file:
-                    if any(regex.search(line) for line in file):
-                        matched_files.append(file_path)
-            except (UnicodeDecodeError, IOError):
+                # DirEntry caches the type from the directory listing, so no stat here
+                is_dir = entry.is_dir()
+            except OSError:
                 continue
-    return matched_files
+            if is_dir:
+                # Like os.walk, list symlinked directories but don't follow them
+                if not entry.is_symlink():
+                    yield from _walk_files(entry.path, exclude_patterns)
+            elif not any(pattern.search(entry.path) for pattern in exclude_patterns):
+                yield entry.path
+
+
+def _file_matches(file_path, regex, max_size=None):
+    """
+    Check if a file contains a match for the bytes regex.
+    The file is memory-mapped and searched as raw bytes; it is not decoded, so
+    callers which read a matching file must handle invalid UTF-8 themselves.
+    Files larger than max_size bytes, or with a NUL byte near the start, are skipped.
+    """
+    try:
+        with open(file_path, "rb") as file:
+            # Empty files cannot be mapped and cannot match anyway
+            size = os.fstat(file.fileno()).st_size
+            if size == 0 or (max_size is not None and size > max_size):
+                return False
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                # Treat files with a NUL byte in the first 4 KiB as binary
+                if data.find(b"\x00", 0, 4096) != -1:
+                    return False
+                if regex.search(data) is None:
+                    return False
+    except (OSError, ValueError):
+        return False
+    return True
 
 
+def grep(root_directory, search_pattern, excludes=[], max_size=None):
+    """
+    Yield the path of each file below root_directory which matches search_pattern.
+    Paths matching any of the exclude patterns, given as strings or
+    compiled patterns, are skipped, as are binary files and files larger
+    than max_size bytes.
+    """
+    # Files are scanned as raw bytes, so the pattern must be bytes too
+    if isinstance(search_pattern, str):
+        search_pattern = search_pattern.encode("utf-8")
+    elif isinstance(getattr(search_pattern, "pattern", None), str):
+        search_pattern = re.compile(
+            search_pattern.pattern.encode("utf-8"), search_pattern.flags & ~re.UNICODE
+        )
+    regex = re.compile(search_pattern)
+    # Already compiled patterns are returned as they are
+    exclude_patterns = [re.compile(pattern) for pattern in excludes]
+
+    # Scan files on a thread pool so their I/O overlaps, while the walk is
+    # still in progress. At most max_pending scans are queued at a time and
+    # matches are yielded as they finish, in walk order.
+    max_pending = _IO_WORKERS * 4
+    pending = collections.deque()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_IO_WORKERS) as executor:
+        for file_path in _walk_files(root_directory, exclude_patterns):
+            pending.append((file_path, executor.submit(_file_matches, file_path, regex, max_size)))
+            if len(pending) >= max_pending:
+                done_path, future = pending.popleft()
+                if future.result():
+                    yield done_path
+        while pending:
+            done_path, future = pending.popleft()
+            if future.result():
+                yield done_path
+
+
+# Diff-style tags for the same item produce the same diff, so remember recent ones
+@functools.lru_cache(maxsize=1024)
 def diff(a_name, a_content, b_name, b_content):
-    diff = difflib.unified_diff(
+    diff = unified_diff(
         a_content.splitlines(), b_content.splitlines(),
         fromfile=a_name, tofile=b_name, lineterm=""
     )
     return "\n".join(diff)
 
 
-@functools.lru_cache()
+def _get_cache_dir():
+    """Return the directory where downloaded specifications are cached."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "ethspecify")
+
+
+def _read_cache_file(cache_path):
+    """Parse the JSON in cache_path, or return None if it is missing or unreadable."""
+    try:
+        with open(cache_path, "rb") as f:
+            return json_loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache_file(cache_path, data):
+    """
+    Write the bytes in data to cache_path, replacing the file atomically.
+    Failing to write the cache is not an error.
+    """
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+
+@functools.lru_cache(maxsize=None)
 def get_pyspec(version="nightly"):
+    # Downloads are kept on disk between runs and revalidated with their ETag,
+    # so an unchanged spec is not downloaded again.
+    cache_path = None
+    etag_path = None
+    headers = {}
+    # Only cache versions which are safe to use as a directory name; one made
+    # of dots alone would point at or above the cache directory
+    if re.fullmatch(r"[\w.-]+", version) and version.strip("."):
+        cache_path = os.path.join(_get_cache_dir(), version, "pyspec.json")
+        etag_path = os.path.join(_get_cache_dir(), version, "pyspec.etag")
+        try:
+            with open(etag_path, "r") as f:
+                headers["If-None-Match"] = f.read().strip()
+        except OSError:
+            pass
+
     url = f"https://raw.githubusercontent.com/jtraglia/ethspecify/main/pyspec/{version}/pyspec.json"
-    response = requests.get(url)
+    response = requests.get(url, headers=headers)
+    if response.status_code == 304:
+        pyspec = _read_cache_file(cache_path)
+        if pyspec is not None:
+            return pyspec
+        # The cached copy has gone missing, so download it again
+        response = requests.get(url)
     response.raise_for_status()
-    return response.json()
+    pyspec = json_loads(response.content)
+
+    if cache_path is not None:
+        # Drop the old ETag first so it can never be paired with a different copy
+        etag = response.headers.get("ETag")
+        try:
+            os.remove(etag_path)
+        except OSError:
+            pass
+        _write_cache_file(cache_path, response.content)
+        if etag:
+            try:
+                with open(etag_path, "w") as f:
+                    f.write(etag)
+            except OSError:
+                pass
+    return pyspec
 
 
 def get_previous_forks(fork, version="nightly"):
+    # Copy the cached result so callers are free to modify it
+    return list(_get_previous_forks(fork, version))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_previous_forks(fork, version):
     pyspec = get_pyspec(version)
     config_vars = pyspec["mainnet"][fork]["config_vars"]
+    skipped_keys = {f"{fork.upper()}_FORK_VERSION", "GENESIS_FORK_VERSION"}
     previous_forks = ["phase0"]
     for key in config_vars.keys():
-        if key.endswith("_FORK_VERSION"):
-            if key != f"{fork.upper()}_FORK_VERSION":
-                if key != "GENESIS_FORK_VERSION":
-                    f = key.split("_")[0].lower()
-                    # Skip EIP forks
-                    if not f.startswith("eip"):
-                        previous_forks.append(f)
-    return list(reversed(previous_forks))
+        if key.endswith("_FORK_VERSION") and key not in skipped_keys:
+            f = key.split("_")[0].lower()
+            # Skip EIP forks
+            if not f.startswith("eip"):
+                previous_forks.append(f)
+    return tuple(reversed(previous_forks))
 
 
-def get_spec(attributes, preset, fork, version="nightly"):
-    pyspec = get_pyspec(version)
-    spec = None
-    if "function" in attributes or "fn" in attributes:
-        if "function" in attributes and "fn" in attributes:
-            raise Exception(f"cannot contain 'function' and 'fn'")
-        if "function" in attributes:
-            function_name = attributes["function"]
-        else:
-            function_name = attributes["fn"]
+def _get_function_spec(attributes, fork_data):
+    if "function" in attributes:
+        function_name = attributes["function"]
+    else:
+        function_name = attributes["fn"]
 
-        spec = pyspec[preset][fork]["functions"][function_name]
-        spec_lines = spec.split("\n")
-        start, end = None, None
+    spec = fork_data["functions"][function_name]
+    if "lines" not in attributes:
+        return spec
 
-        try:
-            vars = attributes["lines"].split("-")
-            if len(vars) == 1:
-                start = min(len(spec_lines), max(1, int(vars[0])))
-                end = start
-            elif len(vars) == 2:
-                start = min(len(spec_lines), max(1, int(vars[0])))
-                end = max(1, min(len(spec_lines), int(vars[1])))
-            else:
-                raise Exception(f"Invalid lines range for {function_name}: {attributes['lines']}")
-        except KeyError:
-            pass
+    # Only split the function when part of it was asked for
+    spec_lines = spec.split("\n")
+    vars = attributes["lines"].split("-")
+    if len(vars) == 1:
+        start = min(len(spec_lines), max(1, int(vars[0])))
+        end = start
+    elif len(vars) == 2:
+        start = min(len(spec_lines), max(1, int(vars[0])))
+        end = max(1, min(len(spec_lines), int(vars[1])))
+    else:
+        raise Exception(f"Invalid lines range for {function_name}: {attributes['lines']}")
 
-        if start or end:
-            start = start or 1
-            if start > end:
-                raise Exception(f"Invalid lines range for {function_name}: ({start}, {end})")
-            # Subtract one because line numbers are one-indexed
-            spec = "\n".join(spec_lines[start-1:end])
-            spec = textwrap.dedent(spec)
-
-    elif "constant_var" in attributes:
-        if spec is not None:
-            raise Exception(f"Tag can only specify one spec item")
-        info = pyspec[preset][fork]["constant_vars"][attributes["constant_var"]]
-        spec = (
-            attributes["constant_var"]
-            + (": " + info[0] if info[0] is not None else "")
-            + " = "
-            + info[1]
-        )
-    elif "preset_var" in attributes:
-        if spec is not None:
-            raise Exception(f"Tag can only specify one spec item")
-        info = pyspec[preset][fork]["preset_vars"][attributes["preset_var"]]
-        spec = (
-            attributes["preset_var"]
-            + (": " + info[0] if info[0] is not None else "")
-            + " = "
-            + info[1]
-        )
-    elif "config_var" in attributes:
-        if spec is not None:
-            raise Exception(f"Tag can only specify one spec item")
-        info = pyspec[preset][fork]["config_vars"][attributes["config_var"]]
-        spec = (
-            attributes["config_var"]
-            + (": " + info[0] if info[0] is not None else "")
-            + " = "
-            + info[1]
-        )
-    elif "custom_type" in attributes:
-        if spec is not None:
-            raise Exception(f"Tag can only specify one spec item")
-        spec = (
-            attributes["custom_type"]
-            + " = "
-            + pyspec[preset][fork]["custom_types"][attributes["custom_type"]]
-        )
-    elif "ssz_object" in attributes or "container" in attributes:
-        if spec is not None:
-            raise Exception(f"Tag can only specify one spec item")
-        if "ssz_object" in attributes and "container" in attributes:
-            raise Exception(f"cannot contain 'ssz_object' and 'container'")
-        if "ssz_object" in attributes:
-            object_name = attributes["ssz_object"]
-        else:
-            object_name = attributes["container"]
-        spec = pyspec[preset][fork]["ssz_objects"][object_name]
-    elif "dataclass" in attributes:
-        if spec is not None:
-            raise Exception(f"Tag can only specify one spec item")
-        spec = pyspec[preset][fork]["dataclasses"][attributes["dataclass"]].replace("@dataclass\n", "")
+    if start > end:
+        raise Exception(f"Invalid lines range for {function_name}: ({start}, {end})")
+    # Subtract one because line numbers are one-indexed
+    spec = "\n".join(spec_lines[start-1:end])
+    return textwrap.dedent(spec)
+
+
+def _format_var_spec(name, info):
+    return (
+        name
+        + (": " + info[0] if info[0] is not None else "")
+        + " = "
+        + info[1]
+    )
+
+
+def _get_constant_var_spec(attributes, fork_data):
+    name = attributes["constant_var"]
+    return _format_var_spec(name, fork_data["constant_vars"][name])
+
+
+def _get_preset_var_spec(attributes, fork_data):
+    name = attributes["preset_var"]
+    return _format_var_spec(name, fork_data["preset_vars"][name])
+
+
+def _get_config_var_spec(attributes, fork_data):
+    name = attributes["config_var"]
+    return _format_var_spec(name, fork_data["config_vars"][name])
+
+
+def _get_custom_type_spec(attributes, fork_data):
+    return (
+        attributes["custom_type"]
+        + " = "
+        + fork_data["custom_types"][attributes["custom_type"]]
+    )
+
+
+def _get_ssz_object_spec(attributes, fork_data):
+    if "ssz_object" in attributes:
+        object_name = attributes["ssz_object"]
+    else:
+        object_name = attributes["container"]
+    return fork_data["ssz_objects"][object_name]
+
+
+def _get_dataclass_spec(attributes, fork_data):
+    return fork_data["dataclasses"][attributes["dataclass"]].replace("@dataclass\n", "")
+
+
+# Spec item attributes and the function which gets each item's spec, in order
+# of precedence: if a tag has several of these, the first one is used
+_SPEC_GETTERS = {
+    "function": _get_function_spec,
+    "fn": _get_function_spec,
+    "constant_var": _get_constant_var_spec,
+    "preset_var": _get_preset_var_spec,
+    "config_var": _get_config_var_spec,
+    "custom_type": _get_custom_type_spec,
+    "ssz_object": _get_ssz_object_spec,
+    "container": _get_ssz_object_spec,
+    "dataclass": _get_dataclass_spec,
+}
+
+# Attributes which name the same kind of spec item, so a tag must not have both
+_ALIASED_ATTRIBUTES = (("function", "fn"), ("ssz_object", "container"))
+
+
+def get_spec(attributes, preset, fork, version="nightly"):
+    # The same item is often tagged many times, so cache lookups by attributes
+    return _get_spec(tuple(sorted(attributes.items())), preset, fork, version)
+
+
+@functools.lru_cache(maxsize=4096)
+def _get_spec(attribute_items, preset, fork, version):
+    attributes = dict(attribute_items)
+    for attribute, get_item_spec in _SPEC_GETTERS.items():
+        if attribute in attributes:
+            break
     else:
         raise Exception("invalid spec tag")
-    return spec
+    for first, second in _ALIASED_ATTRIBUTES:
+        if attribute in (first, second) and first in attributes and second in attributes:
+            raise Exception(f"cannot contain '{first}' and '{second}'")
+    pyspec = get_pyspec(version)
+    return get_item_spec(attributes, pyspec[preset][fork])
 
 def get_latest_fork(version="nightly"):
     """A helper function to get the latest non-eip fork."""
@@ -382,54 +586,52 @@ def get_spec_item_changes(fork, preset="mainnet", version="nightly"):
         'config_vars': {},
     }
 
+    # Index the latest content of every item in the previous forks, walking them
+    # oldest to newest so that the most recent fork wins
+    previous_items = {category: {} for category in changes}
+    for prev_fork in reversed(previous_forks):
+        if prev_fork not in pyspec[preset]:
+            continue
+        prev_fork_data = pyspec[preset][prev_fork]
+        for category, items in previous_items.items():
+            if category in prev_fork_data:
+                items.update(prev_fork_data[category])
+
     # Check each category of spec items
     for category in changes.keys():
         if category not in current_fork_data:
             continue
 
         for item_name, item_content in current_fork_data[category].items():
-            status = _get_item_status(item_name, item_content, category, previous_forks, pyspec, preset)
+            status = _get_item_status(item_name, item_content, previous_items[category])
             if status:
                 changes[category][item_name] = status
 
     return changes
 
 
-def _get_item_status(item_name, current_content, category, previous_forks, pyspec, preset):
+def _get_item_status(item_name, current_content, previous_items):
     """
     Determine if an item is new or modified compared to previous forks.
+    previous_items maps item names to their content in the latest previous fork.
     Returns 'new', 'modified', or None if unchanged.
     """
-    # Check if item exists in any previous fork
-    found_in_previous = False
-    previous_content = None
-
-    for prev_fork in previous_forks:
-        if (prev_fork in pyspec[preset] and
-            category in pyspec[preset][prev_fork] and
-            item_name in pyspec[preset][prev_fork][category]):
-
-            found_in_previous = True
-            prev_content = pyspec[preset][prev_fork][category][item_name]
-
-            # Compare content with immediate previous version
-            if prev_content != current_content:
-                return "modified"
-            else:
-                # Found unchanged version, so this is not new or modified
-                return None
-
     # If not found in any previous fork, it's new
-    if not found_in_previous:
+    if item_name not in previous_items:
         return "new"
 
+    # Compare content with immediate previous version
+    if previous_items[item_name] != current_content:
+        return "modified"
     return None
 
 
+@functools.lru_cache(maxsize=None)
 def get_spec_item_history(preset="mainnet", version="nightly"):
     """
     Get the complete history of all spec items across all forks.
     Returns dict with categories containing items and their fork history.
+    The result is cached and shared between callers, so it must not be modified.
     """
     pyspec = get_pyspec(version)
     if preset not in pyspec:
@@ -441,108 +643,85 @@ def get_spec_item_history(preset="mainnet", version="nightly"):
         key=lambda x: (x != "phase0", x)
     )
 
-    # Track all unique items across all forks
-    all_items = {
-        'functions': set(),
-        'constant_vars': set(),
-        'custom_types': set(),
-        'ssz_objects': set(),
-        'dataclasses': set(),
-        'preset_vars': set(),
-        'config_vars': set(),
+    history = {
+        'functions': {},
+        'constant_vars': {},
+        'custom_types': {},
+        'ssz_objects': {},
+        'dataclasses': {},
+        'preset_vars': {},
+        'config_vars': {},
     }
 
-    # Collect all item names
+    # Walk the forks once, remembering the last content seen for every item
+    last_seen = {category: {} for category in history}
     for fork in all_forks:
-        if fork not in pyspec[preset]:
-            continue
         fork_data = pyspec[preset][fork]
-        for category in all_items.keys():
-            if category in fork_data:
-                all_items[category].update(fork_data[category].keys())
-
-    # Build history for each item
-    history = {}
-    for category in all_items.keys():
-        history[category] = {}
-        for item_name in all_items[category]:
-            item_history = _trace_item_history(item_name, category, all_forks, pyspec, preset)
-            if item_history:
-                history[category][item_name] = item_history
+        for category, category_history in history.items():
+            if category not in fork_data:
+                continue
+            category_last_seen = last_seen[category]
+            for item_name, current_content in fork_data[category].items():
+                if item_name not in category_last_seen:
+                    # First appearance
+                    category_history[item_name] = [fork]
+                elif current_content != category_last_seen[item_name]:
+                    # Content changed
+                    category_history[item_name].append(fork)
+                category_last_seen[item_name] = current_content
 
     return history
 
 
-def _trace_item_history(item_name, category, all_forks, pyspec, preset):
-    """
-    Trace the history of a specific item across all forks.
-    Returns a list of forks where the item was introduced or modified.
-    """
-    history_forks = []
-    previous_content = None
+@functools.lru_cache(maxsize=4096)
+def get_spec_hash(spec):
+    """Return the hash for a spec: the first 8 characters of its SHA256 digest."""
+    return hashlib.sha256(spec.encode('utf-8')).hexdigest()[:8]
 
-    for fork in all_forks:
-        if (fork in pyspec[preset] and
-            category in pyspec[preset][fork] and
-            item_name in pyspec[preset][fork][category]):
-
-            current_content = pyspec[preset][fork][category][item_name]
-
-            if previous_content is None:
-                # First appearance
-                history_forks.append(fork)
-            elif current_content != previous_content:
-                # Content changed
-                history_forks.append(fork)
-
-            previous_content = current_content
-
-    return history_forks
 
 def parse_common_attributes(attributes, config=None):
     if config is None:
         config = {}
 
-    try:
-        preset = attributes["preset"]
-    except KeyError:
-        preset = "mainnet"
-
-    try:
-        version = attributes["version"]
-    except KeyError:
-        version = config.get("version", "nightly")
-
-    try:
+    preset = attributes.get("preset", "mainnet")
+    version = attributes.get("version", config.get("version", "nightly"))
+    # Only look up the latest fork when the tag doesn't name one
+    if "fork" in attributes:
         fork = attributes["fork"]
-    except KeyError:
+    else:
         fork = get_latest_fork(version)
-
-    try:
-        style = attributes["style"]
-    except KeyError:
-        style = config.get("style", "hash")
+    style = attributes.get("style", config.get("style", "hash"))
 
     return preset, fork, style, version
 
-def get_spec_item(attributes, config=None):
+def get_spec_item(attributes, config=None, spec=None):
+    # Callers which already looked up the spec can pass it in to skip a lookup
     preset, fork, style, version = parse_common_attributes(attributes, config)
-    spec = get_spec(attributes, preset, fork, version)
+    if spec is None:
+        spec = get_spec(attributes, preset, fork, version)
 
     if style == "full" or style == "hash":
         return spec
     elif style == "diff":
         previous_forks = get_previous_forks(fork, version)
 
+        # Each fork's spec is compared twice as the walk goes back, so keep them
+        fork_specs = {}
+
+        def get_fork_spec(f):
+            if f not in fork_specs:
+                fork_specs[f] = get_spec(attributes, preset, f, version)
+            return fork_specs[f]
+
         previous_fork = None
         previous_spec = None
         for i, _ in enumerate(previous_forks):
             previous_fork = previous_forks[i]
-            previous_spec = get_spec(attributes, preset, previous_fork, version)
+            previous_spec = get_fork_spec(previous_fork)
             if previous_spec != "phase0":
                 try:
                     previous_previous_fork = previous_forks[i+1]
-                    previous_previous_spec = get_spec(attributes, preset, previous_previous_fork, version)
+                    previous_previous_spec = get_fork_spec(previous_previous_fork)
                     if previous_previous_spec == previous_spec:
                         continue
                 except KeyError:
@@ -589,8 +768,7 @@ def build_spec_link(attributes, fork, version):
 
 
 def extract_attributes(tag):
-    attr_pattern = re.compile(r'(\w+)="(.*?)"')
-    return dict(attr_pattern.findall(tag))
+    return dict(_ATTR_RE.findall(tag))
 
 
 def sort_specref_yaml(yaml_file):
@@ -608,21 +786,22 @@ def sort_specref_yaml(yaml_file):
         # Extract search values that originally had single or double quotes before YAML parsing
         # This preserves the original quoting style exactly
         single_quoted_searches = set()
-        for match in re.finditer(r"search:\s*'([^']*)'", content_str):
+        for match in _SINGLE_QUOTED_SEARCH_RE.finditer(content_str):
             single_quoted_searches.add(match.group(1))
         double_quoted_searches = set()
-        for match in re.finditer(r'search:\s*"([^"]*)"', content_str):
+        for match in _DOUBLE_QUOTED_SEARCH_RE.finditer(content_str):
             double_quoted_searches.add(match.group(1))
 
         # Temporarily quote unquoted search strings with colons so YAML can parse them
         # This doesn't affect the output - we restore original quoting when writing
-        content_str = re.sub(r'(\s+search:\s+)([^"\'\n]+:)(\s*$)', r'\1"\2"\3', content_str, flags=re.MULTILINE)
+        if "search:" in content_str:
+            content_str = _YAML_UNQUOTED_SEARCH_FIX_RE.sub(r'\1"\2"\3', content_str)
 
         try:
-            content = yaml.safe_load(content_str)
+            content = yaml.load(content_str, Loader=_SafeLoader)
         except yaml.YAMLError:
-            # Fall back to FullLoader if safe_load fails
-            content = yaml.load(content_str, Loader=yaml.FullLoader)
+            # Fall back to the full loader if the safe loader fails
+            content = yaml.load(content_str, Loader=_FullLoader)
 
         if not content:
             return False
@@ -731,20 +910,77 @@ def sort_specref_yaml(yaml_file):
 
     return False
 
+def _iter_spec_tags(content):
+    """
+    Yield (start, end, opening tag) for each self-closing or paired spec tag.
+    A tag whose opening ends with "/>" is self-closing; otherwise it runs to the
+    next </spec>, and is skipped if there is none. Once no </spec> is left, the
+    rest of the file is not searched again for every unclosed tag.
+    """
+    pos = 0
+    has_closing_tag = True
+    while True:
+        opening = _OPEN_TAG_RE.search(content, pos)
+        if opening is None:
+            return
+        end = opening.end()
+        if not opening.group(0).endswith("/>"):
+            close = content.find("</spec>", end) if has_closing_tag else -1
+            if close == -1:
+                has_closing_tag = False
+                pos = end
+                continue
+            end = close + len("</spec>")
+        yield opening.start(), end, opening.group(0)
+        pos = end
+
+
+def _open_rewrite(target_path):
+    """
+    Open a temporary file next to target_path to stream its new content into,
+    giving it the same mode and owner, and return it with its path. A file
+    which has other hard links, or whose owner can't be kept, must be written
+    in place instead; then an in-memory buffer is returned with no path.
+    """
+    st = os.stat(target_path)
+    if st.st_nlink > 1:
+        return io.StringIO(), None
+    tmp_path = f"{target_path}.{os.getpid()}.tmp"
+    try:
+        file = open(tmp_path, 'w', encoding='utf-8')
+    except OSError:
+        # The directory may not be writable even though the file is
+        return io.StringIO(), None
+    try:
+        tmp_st = os.fstat(file.fileno())
+        if (tmp_st.st_uid, tmp_st.st_gid) != (st.st_uid, st.st_gid):
+            os.chown(tmp_path, st.st_uid, st.st_gid)
+        shutil.copymode(target_path, tmp_path)
+    except (OSError, AttributeError):
+        # os.chown doesn't exist on Windows
+        file.close()
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return io.StringIO(), None
+    return file, tmp_path
+
+
 def replace_spec_tags(file_path, config=None):
-    with open(file_path, 'r') as file:
+    with open(file_path, 'r', encoding='utf-8') as file:
         content = file.read()
+        # Writing the file back would also normalize any \r\n line endings
+        newlines_normalized = file.newlines not in (None, "\n")
+
+    # Leave files without any spec tags alone
+    if "<spec" not in content:
+        return []
 
     # Use provided config or load from file's directory as fallback
     if config is None:
         config = load_config(os.path.dirname(file_path))
 
-    # Define regex to match self-closing tags and long (paired) tags separately
-    pattern = re.compile(
-        r'(?P<self><spec\b[^>]*\/>)|(?P<long><spec\b[^>]*>[\s\S]*?</spec>)',
-        re.DOTALL
-    )
-
     # Collect processed spec items for potential YAML updates
     processed_items = []
 
@@ -766,25 +1002,13 @@ def replace_spec_tags(file_path, config=None):
         new_tag += f' hash="{hash_value}" />'
         return new_tag
 
-    def replacer(match):
-        # Always use the tag text from whichever group matched:
-        if match.group("self") is not None:
-            original_tag_text = match.group("self")
-        else:
-            original_tag_text = match.group("long")
-        # Determine the original opening tag (ignore inner content)
-        if match.group("self") is not None:
-            original_tag_text = match.group("self")
-        else:
-            long_tag_text = match.group("long")
-            opening_tag_match = re.search(r'<spec\b[^>]*>', long_tag_text)
-            original_tag_text = opening_tag_match.group(0) if opening_tag_match else long_tag_text
-
+    def replacer(start, original_tag_text):
+        # Only the opening tag matters; any inner content is regenerated
         attributes = extract_attributes(original_tag_text)
         print(f"spec tag: {attributes}")
         preset, fork, style, version = parse_common_attributes(attributes, config)
         spec = get_spec(attributes, preset, fork, version)
-        hash_value = hashlib.sha256(spec.encode('utf-8')).hexdigest()[:8]
+        hash_value = get_spec_hash(spec)
 
         # Collect this item for potential YAML updates
         processed_items.append({
@@ -804,22 +1028,56 @@ def replace_spec_tags(file_path, config=None):
         else:
             # For full/diff styles, rebuild as a long (paired) tag.
             new_opening = rebuild_opening_tag(attributes, hash_value)
-            spec_content = get_spec_item(attributes, config)
-            prefix = content[:match.start()].splitlines()[-1]
-            prefixed_spec = "\n".join(
-                f"{prefix}{line}" if line.rstrip() else prefix.rstrip()
+            spec_content = get_spec_item(attributes, config, spec)
+            # Indent the spec with whatever precedes the tag on its line
+            line_start = content.rfind("\n", 0, start) + 1
+            prefix = content[line_start:start]
+            # Blank lines only get the prefix's trailing-whitespace-free form
+            blank_line = prefix.rstrip()
+            prefixed_spec = "\n".join([
+                prefix + line if line and not line.isspace() else blank_line
                 for line in spec_content.split("\n")
-            )
+            ])
             updated_tag = f"{new_opening}\n{prefixed_spec}\n{prefix}</spec>"
             return updated_tag
 
 
-    # Replace all matches in the content
-    updated_content = pattern.sub(replacer, content)
-
-    # Write the updated content back to the file
-    with open(file_path, 'w') as file:
-        file.write(updated_content)
+    # Rebuild all self-closing and long (paired) tags, writing them and the
+    # text between them out as they are produced. The output is only opened
+    # at the first tag which changes, so files whose tags are all up to date,
+    # the usual case, are not written at all.
+    target_path = os.path.realpath(file_path)
+    out, tmp_path = None, None
+    try:
+        last_end = 0
+        for start, end, opening_tag in _iter_spec_tags(content):
+            updated_tag = replacer(start, opening_tag)
+            if out is None:
+                if len(updated_tag) == end - start and content.startswith(updated_tag, start):
+                    continue
+                out, tmp_path = _open_rewrite(target_path)
+            out.write(content[last_end:start])
+            out.write(updated_tag)
+            last_end = end
+        if out is None:
+            if not newlines_normalized:
+                return processed_items
+            out, tmp_path = _open_rewrite(target_path)
+        out.write(content[last_end:])
+        if tmp_path is not None:
+            out.close()
+            os.replace(tmp_path, target_path)
+        else:
+            with open(target_path, 'w', encoding='utf-8') as file:
+                file.write(out.getvalue())
+    except BaseException:
+        if tmp_path is not None:
+            out.close()
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        raise
 
     # Return processed items for potential YAML updates
     return processed_items
@@ -851,6 +1109,38 @@ def get_spec_attr_and_name(attributes):
     return None, None
 
 
+def _quote_search_values(content_str):
+    """Quote unquoted search values ending with a colon so that YAML can parse them."""
+    # Files without search keys need no fixing, so skip the regex pass and its copy
+    if "search:" not in content_str:
+        return content_str
+    return _YAML_SEARCH_FIX_RE.sub(r'\1"\2"\3', content_str)
+
+
+def _load_specref_yaml(yaml_file):
+    """
+    Parse a specref YAML file. Checks read the same file several times, so the
+    result is cached until the file changes on disk and must not be modified.
+    """
+    st = os.stat(yaml_file)
+    return _parse_specref_yaml(yaml_file, st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_specref_yaml(yaml_file, mtime_ns, size):
+    with open(yaml_file, 'r') as f:
+        content_str = f.read()
+
+    # Try to fix common YAML issues with unquoted search strings containing colons
+    content_str = _quote_search_values(content_str)
+
+    try:
+        return yaml.load(content_str, Loader=_SafeLoader)
+    except yaml.YAMLError:
+        # Fall back to the full loader if the safe loader fails
+        return yaml.load(content_str, Loader=_FullLoader)
+
+
 def load_yaml_entries(yaml_file):
     """Load existing entries from a YAML file."""
     if not os.path.exists(yaml_file):
@@ -861,12 +1151,12 @@ def load_yaml_entries(yaml_file):
             content_str = f.read()
 
         # Try to fix common YAML issues with unquoted search strings containing colons
-        content_str = re.sub(r'(\s+search:\s+)([^"\n]+:)(\s*$)', r'\1"\2"\3', content_str, flags=re.MULTILINE)
+        content_str = _quote_search_values(content_str)
 
         try:
-            content = yaml.safe_load(content_str)
+            content = yaml.load(content_str, Loader=_SafeLoader)
         except yaml.YAMLError:
-            content = yaml.load(content_str, Loader=yaml.FullLoader)
+            content = yaml.load(content_str, Loader=_FullLoader)
 
         if isinstance(content, list):
             return content
@@ -881,7 +1171,7 @@ def extract_spec_tag_key(spec_content, alias_groups=None, alias_preference=None)
         return None
 
     # Extract the opening spec tag
-    match = re.search(r'<spec\b([^>]*)>', spec_content)
+    match = _OPEN_TAG_RE.search(spec_content)
     if not match:
         return None
 
@@ -922,9 +1212,9 @@ def add_missing_entries_to_yaml(yaml_file, new_entries):
     if os.path.exists(yaml_file):
         with open(yaml_file, 'r') as f:
             content_str = f.read()
-        for match in re.finditer(r"search:\s*'([^']*)'", content_str):
+        for match in _SINGLE_QUOTED_SEARCH_RE.finditer(content_str):
             single_quoted_searches.add(match.group(1))
-        for match in re.finditer(r'search:\s*"([^"]*)"', content_str):
+        for match in _DOUBLE_QUOTED_SEARCH_RE.finditer(content_str):
             double_quoted_searches.add(match.group(1))
 
     # Load existing entries
@@ -940,7 +1230,7 @@ def add_missing_entries_to_yaml(yaml_file, new_entries):
         if not isinstance(entry, dict) or 'spec' not in entry:
             continue
         spec_content = entry.get('spec', '')
-        match = re.search(r'<spec\b([^>]*)>', spec_content)
+        match = _OPEN_TAG_RE.search(spec_content)
         if not match:
             continue
         attributes = extract_attributes(match.group(0))
@@ -1014,6 +1304,21 @@ def add_missing_entries_to_yaml(yaml_file, new_entries):
     print(f"Added {len(entries_to_add)} new entries to {yaml_file}")
 
 
+def _read_text(path):
+    """Read a UTF-8 text file, returning the error instead of raising it."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except (IOError, UnicodeDecodeError) as e:
+        return e
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_search(search_string):
+    """Compile a regex search string from a specref, once per distinct string."""
+    return re.compile(search_string, re.MULTILINE)
+
+
 def check_source_files(yaml_file, project_root, exceptions=None):
     """
     Check that source files referenced in a YAML file exist and contain expected search strings.
@@ -1028,18 +1333,7 @@ def check_source_files(yaml_file, project_root, exceptions=None):
     total_count = 0
 
     try:
-        with open(yaml_file, 'r') as f:
-            content_str = f.read()
-
-        # Try to fix common YAML issues with unquoted search strings
-        # Replace unquoted search values ending with colons
-        content_str = re.sub(r'(\s+search:\s+)([^"\n]+:)(\s*$)', r'\1"\2"\3', content_str, flags=re.MULTILINE)
-
-        try:
-            content = yaml.safe_load(content_str)
-        except yaml.YAMLError:
-            # Fall back to FullLoader if safe_load fails
-            content = yaml.load(content_str, Loader=yaml.FullLoader)
+        content = _load_specref_yaml(yaml_file)
     except (yaml.YAMLError, IOError) as e:
         return 0, 0, [f"YAML parsing error in {yaml_file}: {e}"]
 
@@ -1049,6 +1343,28 @@ def check_source_files(yaml_file, project_root, exceptions=None):
     # Handle both array of objects and single object formats
     items = content if isinstance(content, list) else [content]
 
+    # Many entries point at the same source files, so read each file only once.
+    # Files which will be searched or line-checked are read on a thread pool up
+    # front so their I/O overlaps; the checks below then run in order as before.
+    paths_to_read = set()
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get('sources'), list):
+            continue
+        for source in item['sources']:
+            if isinstance(source, dict) and isinstance(source.get('file'), str):
+                if source.get('search') or '#L' in source['file']:
+                    paths_to_read.add(os.path.join(project_root, source['file'].split('#L', 1)[0]))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_IO_WORKERS) as executor:
+        source_contents = dict(zip(paths_to_read, executor.map(_read_text, paths_to_read)))
+
+    def read_source(path):
+        if path not in source_contents:
+            source_contents[path] = _read_text(path)
+        content = source_contents[path]
+        if isinstance(content, Exception):
+            raise content
+        return content
+
     for item in items:
         if not isinstance(item, dict) or 'sources' not in item:
             continue
@@ -1059,13 +1375,13 @@ def check_source_files(yaml_file, project_root, exceptions=None):
             # Try to extract spec reference from spec content
             spec_content = item['spec']
             # Look for any spec tag attribute and fork
-            spec_tag_match = re.search(r'<spec\s+([^>]+)>', spec_content)
+            spec_tag_match = _TAG_ATTRS_RE.search(spec_content)
             if spec_tag_match:
                 tag_attrs = spec_tag_match.group(1)
                 # Extract fork
-                fork_match = re.search(r'fork="([^"]+)"', tag_attrs)
+                fork_match = _FORK_RE.search(tag_attrs)
                 # Extract the main attribute (not hash or fork)
-                attr_matches = re.findall(r'(\w+)="([^"]+)"', tag_attrs)
+                attr_matches = _NONEMPTY_ATTR_RE.findall(tag_attrs)
 
                 if fork_match:
                     fork = fork_match.group(1)
@@ -1157,9 +1473,11 @@ def check_source_files(yaml_file, project_root, exceptions=None):
             # Check line range if specified
             if line_range:
                 try:
-                    with open(full_path, 'r', encoding='utf-8') as f:
-                        lines = f.readlines()
-                        total_lines = len(lines)
+                    content = read_source(full_path)
+                    # Count lines like readlines() would, without building a list of them
+                    total_lines = content.count("\n")
+                    if content and not content.endswith("\n"):
+                        total_lines += 1
 
                     # Parse line range
                     if '-' in line_range:
@@ -1194,28 +1512,27 @@ def check_source_files(yaml_file, project_root, exceptions=None):
             # Check search string if provided
             if search_string:
                 try:
-                    with open(full_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-
-                        if is_regex:
-                            # Use regex search
-                            try:
-                                pattern = re.compile(search_string, re.MULTILINE)
-                                matches = list(pattern.finditer(content))
-                                count = len(matches)
-                                search_type = "REGEX"
-                            except re.error as e:
-                                errors.append(f"INVALID REGEX: {ref_prefix}'{search_string}' in {file_path} - {e}")
-                                continue
-                        else:
-                            # Use literal string search
-                            count = content.count(search_string)
-                            search_type = "SEARCH"
-
-                        if count == 0:
-                            errors.append(f"{search_type} NOT FOUND: {ref_prefix}'{search_string}' in {file_path}")
-                        elif count > 1:
-                            errors.append(f"AMBIGUOUS {search_type}: {ref_prefix}'{search_string}' found {count} times in {file_path}")
+                    content = read_source(full_path)
+
+                    if is_regex:
+                        # Use regex search
+                        try:
+                            pattern = _compile_search(search_string)
+                            matches = list(pattern.finditer(content))
+                            count = len(matches)
+                            search_type = "REGEX"
+                        except re.error as e:
+                            errors.append(f"INVALID REGEX: {ref_prefix}'{search_string}' in {file_path} - {e}")
+                            continue
+                    else:
+                        # Use literal string search
+                        count = content.count(search_string)
+                        search_type = "SEARCH"
+
+                    if count == 0:
+                        errors.append(f"{search_type} NOT FOUND: {ref_prefix}'{search_string}' in {file_path}")
+                    elif count > 1:
+                        errors.append(f"AMBIGUOUS {search_type}: {ref_prefix}'{search_string}' found {count} times in {file_path}")
                 except (IOError, UnicodeDecodeError):
                     errors.append(f"ERROR READING: {ref_prefix}{file_path}")
 
@@ -1223,6 +1540,21 @@ def check_source_files(yaml_file, project_root, exceptions=None):
     return valid_count, total_count, errors
 
 
+# Spec tag attributes naming an item, with the tag type each one stands for,
+# in order of precedence
+_TAG_TYPE_ATTRIBUTES = (
+    ('fn', 'fn'),
+    ('function', 'fn'),
+    ('constant_var', 'constant_var'),
+    ('config_var', 'config_var'),
+    ('preset_var', 'preset_var'),
+    ('ssz_object', 'ssz_object'),
+    ('container', 'ssz_object'),
+    ('dataclass', 'dataclass'),
+    ('custom_type', 'custom_type'),
+)
+
+
 def extract_spec_tags_from_yaml(yaml_file, tag_type=None):
     """
     Extract spec tags from a YAML file and return (tag_types_found, item#fork pairs).
@@ -1234,24 +1566,8 @@ def extract_spec_tags_from_yaml(yaml_file, tag_type=None):
     pairs = set()
     tag_types_found = set()
 
-    # Known tag type attributes
-    tag_attributes = ['fn', 'function', 'constant_var', 'config_var', 'preset_var',
-                      'ssz_object', 'container', 'dataclass', 'custom_type']
-
     try:
-        with open(yaml_file, 'r') as f:
-            content_str = f.read()
-
-        # Try to fix common YAML issues with unquoted search strings
-        # Replace unquoted search values ending with colons
-        content_str = re.sub(r'(\s+search:\s+)([^"\n]+:)(\s*$)', r'\1"\2"\3', content_str, flags=re.MULTILINE)
-
-        try:
-            content = yaml.safe_load(content_str)
-        except yaml.YAMLError:
-            # Fall back to FullLoader if safe_load fails
-            content = yaml.load(content_str, Loader=yaml.FullLoader)
-
+        content = _load_specref_yaml(yaml_file)
         if not content:
             return tag_types_found, pairs
 
@@ -1267,35 +1583,26 @@ def extract_spec_tags_from_yaml(yaml_file, tag_type=None):
                 continue
 
             # Find all spec tags in the content
-            spec_tag_pattern = r'<spec\s+([^>]+)>'
-            spec_matches = re.findall(spec_tag_pattern, spec_content)
+            spec_matches = _TAG_ATTRS_RE.findall(spec_content)
 
             for tag_attrs_str in spec_matches:
-                # Extract all attributes from the tag
-                attrs = dict(re.findall(r'(\w+)="([^"]+)"', tag_attrs_str))
-
-                # Find which tag type this is
-                found_tag_type = None
-                item_name = None
+                # Extract all attributes from the tag; tags without a fork are skipped
+                attrs = dict(_NONEMPTY_ATTR_RE.findall(tag_attrs_str))
+                if 'fork' not in attrs:
+                    continue
 
-                for attr in tag_attributes:
+                # Find which tag type this is, normalizing aliases like function to fn
+                for attr, found_tag_type in _TAG_TYPE_ATTRIBUTES:
                     if attr in attrs:
-                        found_tag_type = attr
-                        item_name = attrs[attr]
-                        # Normalize function to fn
-                        if found_tag_type == 'function':
-                            found_tag_type = 'fn'
-                        # Normalize container to ssz_object
-                        if found_tag_type == 'container':
-                            found_tag_type = 'ssz_object'
                         break
+                else:
+                    continue
 
-                if found_tag_type and 'fork' in attrs:
-                    tag_types_found.add(found_tag_type)
+                tag_types_found.add(found_tag_type)
 
-                    # If tag_type filter is specified, only add matching types
-                    if tag_type is None or tag_type == found_tag_type:
-                        pairs.add(f"{item_name}#{attrs['fork']}")
+                # If tag_type filter is specified, only add matching types
+                if tag_type is None or tag_type == found_tag_type:
+                    pairs.add(f"{attrs[attr]}#{attrs['fork']}")
 
     except (IOError, UnicodeDecodeError, yaml.YAMLError):
         pass
@@ -1316,8 +1623,7 @@ def generate_specrefs_from_files(files_with_spec_tags, project_dir):
                 content = f.read()
 
             # Find all spec tags in the file
-            spec_tag_pattern = r'<spec\s+([^>]+?)(?:\s*/>|>)'
-            matches = re.finditer(spec_tag_pattern, content)
+            matches = _OPEN_TAG_ATTRS_RE.finditer(content)
 
             for match in matches:
                 tag_attrs_str = match.group(1)
@@ -1536,26 +1842,22 @@ def check_coverage(yaml_file, tag_type, exceptions, preset="mainnet", version="n
     # Get actual pairs from YAML file
     _, actual_pairs = extract_spec_tags_from_yaml(yaml_file, tag_type)
 
-    # Find missing items (excluding exceptions)
-    missing_items = []
+    # Find missing items (excluding exceptions); only items without a tag
+    # need to be checked against the exceptions
     total_count = len(expected_pairs)
-
-    for item_fork in expected_pairs:
-        item_name, fork = item_fork.split('#', 1)
-
-        if is_excepted(item_name, fork, exceptions):
-            continue
-
-        if item_fork not in actual_pairs:
-            missing_items.append(item_fork)
+    missing_items = [
+        item_fork for item_fork in expected_pairs - actual_pairs
+        if not is_excepted(*item_fork.split('#', 1), exceptions)
+    ]
 
     found_count = total_count - len(missing_items)
     return found_count, total_count, missing_items
 
 
-def run_checks(project_dir, config):
+def run_checks(project_dir, config, fast_fail=False):
     """
     Run all checks based on the configuration.
+    If fast_fail is set, stop after the first specrefs file which fails.
     Returns (success, results)
     """
     results = {}
@@ -1605,7 +1907,7 @@ def run_checks(project_dir, config):
         print(f"Searching for spec tags in: {search_root}")
 
         # Use grep to find all files containing spec tags
-        files_with_spec_tags = grep(search_root, r'<spec\b[^>]*>', [])
+        files_with_spec_tags = list(grep(search_root, SPEC_RE, []))
 
         if not files_with_spec_tags:
             print(f"No files with spec tags found in the project")
@@ -1637,6 +1939,8 @@ def run_checks(project_dir, config):
         if not os.path.exists(yaml_path):
             print(f"Error: File {filename} defined in config but not found")
             overall_success = False
+            if fast_fail:
+                break
             continue
 
         # Detect tag types in the file
@@ -1744,6 +2048,9 @@ def run_checks(project_dir, config):
             if source_errors or all_missing_items:
                 overall_success = False
 
+        if fast_fail and not overall_success:
+            break
+
     return overall_success, results
 
 
@@ -1763,9 +2070,9 @@ def update_entry_names_in_yaml_files(project_dir, specrefs_files):
         double_quoted_searches = set()
         with open(yaml_path, 'r') as f:
             content_str = f.read()
-        for match in re.finditer(r"search:\s*'([^']*)'", content_str):
+        for match in _SINGLE_QUOTED_SEARCH_RE.finditer(content_str):
             single_quoted_searches.add(match.group(1))
-        for match in re.finditer(r'search:\s*"([^"]*)"', content_str):
+        for match in _DOUBLE_QUOTED_SEARCH_RE.finditer(content_str):
             double_quoted_searches.add(match.group(1))
 
         # Load existing entries
@@ -1780,7 +2087,7 @@ def update_entry_names_in_yaml_files(project_dir, specrefs_files):
 
             # Extract spec tag attributes
             spec_content = entry['spec']
-            match = re.search(r'<spec\b([^>]*)>', spec_content)
+            match = _OPEN_TAG_RE.search(spec_content)
             if not match:
                 continue
 
@@ -1912,7 +2219,7 @@ def add_missing_spec_items_to_yaml_files(project_dir, config, specrefs_files):
             for entry in existing_entries:
                 if not isinstance(entry, dict) or 'spec' not in entry:
                     continue
-                match = re.search(r'<spec\b([^>]*)>', entry.get('spec', ''))
+                match = _OPEN_TAG_RE.search(entry.get('spec', ''))
                 if not match:
                     continue
                 attributes = extract_attributes(match.group(0))
@@ -2003,7 +2310,7 @@ def add_missing_spec_items_to_yaml_files(project_dir, config, specrefs_files):
 
             for idx, (fork, item_data, spec_content) in enumerate(versions):
                 # Calculate hash of current version
-                hash_value = hashlib.sha256(spec_content.encode('utf-8')).hexdigest()[:8]
+                hash_value = get_spec_hash(spec_content)
 
                 # Build spec tag
                 spec_tag = f'<spec {spec_attr}="{item_name}" fork="{fork}" hash="{hash_value}">'
@@ -2145,7 +2452,7 @@ def generate_specref_files(output_dir, version="nightly", preset="mainnet"):
 
             for idx, (fork, item_data, spec_content) in enumerate(versions):
                 # Calculate hash of current version
-                hash_value = hashlib.sha256(spec_content.encode('utf-8')).hexdigest()[:8]
+                hash_value = get_spec_hash(spec_content)
 
                 # Build spec tag
                 spec_tag = f'<spec {spec_attr}="{item_name}" fork="{fork}" hash="{hash_value}">'